@@ -1,11 +1,14 @@
 from __future__ import annotations
 import os
-from flask import Flask, render_template, request, redirect, url_for, session, flash
+from flask import Flask, render_template, request, redirect, url_for, session, flash, g
 from models import get_db, close_db, migrate
 from auth import set_factory, set_retail, check_branch_pass, require_login, is_factory, is_retail
 from routes_orders import bp_orders
 from routes_invoices import bp_invoices
 from routes_settings import bp_settings
+from routes_sync import bp_sync
+from routes_reports import bp_reports
+from assets import init_assets
 
 APP_SECRET = os.environ.get("FLASK_SECRET", "dev-secret")
 ADMIN_PASS = os.environ.get("ADMIN_PASSCODE", "HKGOF2025@")
@@ -17,6 +20,8 @@ app.teardown_appcontext(close_db)
 app.register_blueprint(bp_orders)
 app.register_blueprint(bp_invoices)
 app.register_blueprint(bp_settings)
+app.register_blueprint(bp_sync)
+app.register_blueprint(bp_reports)
 
 I18N = {
     "en": {
@@ -39,14 +44,19 @@ I18N = {
     },
 }
 
+# per-locale label tables with English fallback, built once at import
+LABELS = {lang: {**I18N["en"], **table} for lang, table in I18N.items()}
+
 def t(key:str)->str:
-    lang = session.get("lang", "en")
-    return I18N.get(lang, I18N["en"]).get(key, key)
+    # g.labels is set by ensure_lang; renders outside it fall back to the session
+    labels = g.get("labels") or LABELS.get(session.get("lang", "en"), LABELS["en"])
+    return labels.get(key, key)
 
 @app.before_request
 def ensure_lang():
     if "lang" not in session:
         session["lang"]="en"
+    g.labels = LABELS.get(session["lang"], LABELS["en"])
 
 @app.route("/lang/<code>")
 def set_lang(code:str):
@@ -109,6 +119,12 @@ def logout():
 @app.context_processor
 def inject_header():
     return {"is_factory": is_factory, "is_retail": is_retail, "t": t}
+
+# migrate the schema, compile templates and build static assets at import,
+# i.e. once in the gunicorn master under --preload
+with app.app_context():
+    migrate()
+init_assets(app)
  
 if __name__ == "__main__":
     import os
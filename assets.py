@@ -0,0 +1,168 @@
+import os, gzip, hashlib, mimetypes, tempfile, time
+import click
+from flask import current_app, request, send_from_directory, send_file
+from flask.cli import AppGroup
+from jinja2 import FileSystemBytecodeCache
+
+try:
+    import brotli
+except ImportError:  # gzip only
+    brotli = None
+
+COMPRESS_MIN_SIZE = int(os.environ.get("COMPRESS_MIN_SIZE", 1024))
+COMPRESS_MIMETYPES = {"text/html", "application/json", "text/csv"}
+PRECOMPRESS_EXT = {".css", ".js", ".svg", ".html", ".json", ".txt"}
+GZIP_LEVEL = 6
+BROTLI_LEVEL = 5          # per response; cheap enough to run on every page
+BROTLI_STATIC_LEVEL = 11  # once per file at startup
+IMMUTABLE = 365 * 24 * 3600
+
+# filename -> {"hash", "gz", "br", "size", "gz_size", "br_size"}
+MANIFEST = {}
+STATS = {}
+
+def _pick_encoding():
+    if brotli is not None and request.accept_encodings["br"]:
+        return "br"
+    if request.accept_encodings["gzip"]:
+        return "gzip"
+    return None
+
+# -------- Templates --------
+def warm_templates(app):
+    """Compile every template now (with --preload: once, in the master) and
+    keep the bytecode on disk so the next start skips the parse step.
+
+    The bytecode is loaded with marshal, so it lives in cache_dir(), which
+    only this user can write to.
+    """
+    bc_dir = os.path.join(cache_dir(app), "jinja")
+    os.makedirs(bc_dir, mode=0o700, exist_ok=True)
+    app.jinja_env.bytecode_cache = FileSystemBytecodeCache(bc_dir)
+    names = app.jinja_env.list_templates()
+    for name in names:
+        app.jinja_env.get_template(name)
+    return len(names)
+
+# -------- Static files --------
+def cache_dir(app):
+    """instance/asset-cache (or ASSET_CACHE_DIR), owned by us and 0700."""
+    path = os.environ.get("ASSET_CACHE_DIR") or os.path.join(app.instance_path, "asset-cache")
+    os.makedirs(path, mode=0o700, exist_ok=True)
+    st = os.stat(path)
+    if st.st_uid != os.getuid():
+        raise RuntimeError(f"asset cache {path} is not owned by the current user")
+    if st.st_mode & 0o077:
+        os.chmod(path, 0o700)
+    return path
+
+def _write_atomic(path, data):
+    # temp file + os.replace: concurrent or crashed starts never leave a
+    # truncated file behind the immutable name
+    os.makedirs(os.path.dirname(path), mode=0o700, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "wb") as fh:
+            fh.write(data)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+def build_static(app):
+    """Fingerprint static files and write .gz/.br siblings under cache_dir()."""
+    out_dir = os.path.join(cache_dir(app), "static")
+    MANIFEST.clear()
+    for root, _, files in os.walk(app.static_folder):
+        for fn in files:
+            path = os.path.join(root, fn)
+            rel = os.path.relpath(path, app.static_folder).replace(os.sep, "/")
+            with open(path, "rb") as fh:
+                data = fh.read()
+            entry = {"hash": hashlib.md5(data).hexdigest()[:12], "size": len(data),
+                     "gz": None, "br": None, "gz_size": None, "br_size": None}
+            if os.path.splitext(fn)[1] in PRECOMPRESS_EXT:
+                variants = [("gz", gzip.compress(data, GZIP_LEVEL, mtime=0))]
+                if brotli is not None:
+                    variants.append(("br", brotli.compress(data, quality=BROTLI_STATIC_LEVEL)))
+                for ext, blob in variants:
+                    if len(blob) >= len(data):
+                        continue
+                    target = os.path.join(out_dir, f"{rel}.{entry['hash']}.{ext}")
+                    # compression is deterministic; a size mismatch means a partial file
+                    if not (os.path.exists(target) and os.path.getsize(target) == len(blob)):
+                        _write_atomic(target, blob)
+                    entry[ext], entry[f"{ext}_size"] = target, len(blob)
+            MANIFEST[rel] = entry
+
+def static_fingerprint(endpoint, values):
+    # url_for('static', filename=...) -> /static/<file>?v=<hash>
+    if endpoint == "static" and "v" not in values:
+        entry = MANIFEST.get(values.get("filename"))
+        if entry:
+            values["v"] = entry["hash"]
+
+def serve_static(filename):
+    """Replacement for Flask's static view: precompressed variants, and
+    immutable caching when the URL carries the current fingerprint."""
+    entry = MANIFEST.get(filename)
+    fresh = entry is not None and request.args.get("v") == entry["hash"]
+    max_age = IMMUTABLE if fresh else None
+
+    enc = _pick_encoding() if entry else None
+    if enc == "gzip" and not entry["gz"]:
+        enc = None
+    if enc == "br" and not entry["br"]:
+        enc = "gzip" if entry["gz"] and request.accept_encodings["gzip"] else None
+
+    if enc:
+        mimetype = mimetypes.guess_type(filename)[0] or "application/octet-stream"
+        response = send_file(entry["br" if enc == "br" else "gz"], mimetype=mimetype,
+                             max_age=max_age, conditional=True)
+        response.headers["Content-Encoding"] = enc
+    else:
+        response = send_from_directory(current_app.static_folder, filename, max_age=max_age)
+    if entry and (entry["gz"] or entry["br"]):
+        response.vary.add("Accept-Encoding")
+    if fresh:
+        response.cache_control.immutable = True
+        response.cache_control.public = True
+    return response
+
+# -------- Dynamic responses --------
+def compress_response(response):
+    if (response.status_code != 200 or response.direct_passthrough or response.is_streamed
+            or response.mimetype not in COMPRESS_MIMETYPES or "Content-Encoding" in response.headers):
+        return response
+    response.vary.add("Accept-Encoding")
+    data = response.get_data()
+    enc = _pick_encoding() if len(data) >= COMPRESS_MIN_SIZE else None
+    if not enc:
+        return response
+    if enc == "br":
+        response.set_data(brotli.compress(data, quality=BROTLI_LEVEL))
+    else:
+        response.set_data(gzip.compress(data, GZIP_LEVEL))
+    response.headers["Content-Encoding"] = enc
+    return response
+
+# -------- Wiring --------
+def init_assets(app):
+    t0 = time.perf_counter()
+    STATS["templates"] = warm_templates(app)
+    build_static(app)
+    STATS["warm_ms"] = round((time.perf_counter() - t0) * 1000, 1)
+
+    app.url_defaults(static_fingerprint)
+    app.view_functions["static"] = serve_static
+    app.after_request(compress_response)
+    app.cli.add_command(assets_cli)
+
+assets_cli = AppGroup("assets", help="Template and static asset pipeline.")
+
+@assets_cli.command("stats")
+def assets_stats():
+    """Startup warm-up time and static sizes (raw / gzip / brotli)."""
+    click.echo(f"templates compiled: {STATS.get('templates')}  warm-up: {STATS.get('warm_ms')} ms")
+    for name, e in sorted(MANIFEST.items()):
+        click.echo(f"{name}?v={e['hash']}  {e['size']} B  gz {e['gz_size'] or '-'}  br {e['br_size'] or '-'}")
@@ -1,6 +1,6 @@
 import os
 from functools import wraps
-from flask import session, redirect, url_for, request, flash
+from flask import session, redirect, url_for, request, flash, jsonify
 from models import get_db
 
 ADMIN_PASS = os.environ.get("ADMIN_PASSCODE", "HKGOF2025@")
@@ -22,6 +22,14 @@ def require_login(f):
         return f(*a, **k)
     return _w
 
+def require_api_login(f):
+    @wraps(f)
+    def _w(*a, **k):
+        if not is_authed():
+            return jsonify({"error": "Login required."}), 401
+        return f(*a, **k)
+    return _w
+
 def require_factory(f):
     @wraps(f)
     def _w(*a, **k):
@@ -165,16 +165,277 @@ CREATE TABLE IF NOT EXISTS price_book (
 );
 
 CREATE INDEX IF NOT EXISTS idx_invoices_created_at ON invoices(created_at);
+-- parent -> children lookups: print view join, change-feed and rollup
+-- triggers on parent delete/move, item lists
+CREATE INDEX IF NOT EXISTS idx_order_items_order ON order_items(order_id, id);
+CREATE INDEX IF NOT EXISTS idx_invoice_items_invoice ON invoice_items(invoice_id);
+
+-- Change feed for branch sync: one row per write, version only ever grows.
+-- branch (orders.branch) / branch_id (invoices.branch_id) scope the row to a branch.
+CREATE TABLE IF NOT EXISTS change_log (
+  version INTEGER PRIMARY KEY AUTOINCREMENT,
+  entity TEXT NOT NULL,      -- orders / order_items / invoices / invoice_items
+  entity_id INTEGER NOT NULL,
+  op TEXT NOT NULL,          -- I / U / D
+  branch TEXT,
+  branch_id INTEGER,
+  changed_at TEXT DEFAULT (datetime('now'))
+);
+CREATE INDEX IF NOT EXISTS idx_change_log_branch ON change_log(branch, version);
+CREATE INDEX IF NOT EXISTS idx_change_log_branch_id ON change_log(branch_id, version);
+
+CREATE TRIGGER IF NOT EXISTS trg_orders_ins AFTER INSERT ON orders BEGIN
+  INSERT INTO change_log(entity, entity_id, op, branch) VALUES ('orders', NEW.id, 'I', NEW.branch);
+END;
+CREATE TRIGGER IF NOT EXISTS trg_orders_upd AFTER UPDATE ON orders BEGIN
+  INSERT INTO change_log(entity, entity_id, op, branch)
+    SELECT 'orders', OLD.id, 'D', OLD.branch WHERE OLD.branch IS NOT NEW.branch;
+  INSERT INTO change_log(entity, entity_id, op, branch) VALUES ('orders', NEW.id, 'U', NEW.branch);
+  -- moving an order to another branch moves its items with it
+  INSERT INTO change_log(entity, entity_id, op, branch)
+    SELECT 'order_items', id, 'D', OLD.branch FROM order_items WHERE order_id=NEW.id AND OLD.branch IS NOT NEW.branch;
+  INSERT INTO change_log(entity, entity_id, op, branch)
+    SELECT 'order_items', id, 'U', NEW.branch FROM order_items WHERE order_id=NEW.id AND OLD.branch IS NOT NEW.branch;
+END;
+-- items go with the order via ON DELETE CASCADE, and by then their order row
+-- (and its branch) is gone, so log their tombstones here while OLD.branch is known
+CREATE TRIGGER IF NOT EXISTS trg_orders_del_items BEFORE DELETE ON orders BEGIN
+  INSERT INTO change_log(entity, entity_id, op, branch)
+    SELECT 'order_items', id, 'D', OLD.branch FROM order_items WHERE order_id=OLD.id;
+END;
+CREATE TRIGGER IF NOT EXISTS trg_orders_del AFTER DELETE ON orders BEGIN
+  INSERT INTO change_log(entity, entity_id, op, branch) VALUES ('orders', OLD.id, 'D', OLD.branch);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_order_items_ins AFTER INSERT ON order_items BEGIN
+  INSERT INTO change_log(entity, entity_id, op, branch)
+    VALUES ('order_items', NEW.id, 'I', (SELECT branch FROM orders WHERE id=NEW.order_id));
+END;
+CREATE TRIGGER IF NOT EXISTS trg_order_items_upd AFTER UPDATE ON order_items BEGIN
+  INSERT INTO change_log(entity, entity_id, op, branch)
+    VALUES ('order_items', NEW.id, 'U', (SELECT branch FROM orders WHERE id=NEW.order_id));
+END;
+CREATE TRIGGER IF NOT EXISTS trg_order_items_del AFTER DELETE ON order_items BEGIN
+  INSERT INTO change_log(entity, entity_id, op, branch)
+    VALUES ('order_items', OLD.id, 'D', (SELECT branch FROM orders WHERE id=OLD.order_id));
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_invoices_ins AFTER INSERT ON invoices BEGIN
+  INSERT INTO change_log(entity, entity_id, op, branch_id) VALUES ('invoices', NEW.id, 'I', NEW.branch_id);
+END;
+CREATE TRIGGER IF NOT EXISTS trg_invoices_upd AFTER UPDATE ON invoices BEGIN
+  INSERT INTO change_log(entity, entity_id, op, branch_id)
+    SELECT 'invoices', OLD.id, 'D', OLD.branch_id WHERE OLD.branch_id IS NOT NEW.branch_id;
+  INSERT INTO change_log(entity, entity_id, op, branch_id) VALUES ('invoices', NEW.id, 'U', NEW.branch_id);
+  INSERT INTO change_log(entity, entity_id, op, branch_id)
+    SELECT 'invoice_items', id, 'D', OLD.branch_id FROM invoice_items WHERE invoice_id=NEW.id AND OLD.branch_id IS NOT NEW.branch_id;
+  INSERT INTO change_log(entity, entity_id, op, branch_id)
+    SELECT 'invoice_items', id, 'U', NEW.branch_id FROM invoice_items WHERE invoice_id=NEW.id AND OLD.branch_id IS NOT NEW.branch_id;
+END;
+CREATE TRIGGER IF NOT EXISTS trg_invoices_del_items BEFORE DELETE ON invoices BEGIN
+  INSERT INTO change_log(entity, entity_id, op, branch_id)
+    SELECT 'invoice_items', id, 'D', OLD.branch_id FROM invoice_items WHERE invoice_id=OLD.id;
+END;
+CREATE TRIGGER IF NOT EXISTS trg_invoices_del AFTER DELETE ON invoices BEGIN
+  INSERT INTO change_log(entity, entity_id, op, branch_id) VALUES ('invoices', OLD.id, 'D', OLD.branch_id);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_invoice_items_ins AFTER INSERT ON invoice_items BEGIN
+  INSERT INTO change_log(entity, entity_id, op, branch_id)
+    VALUES ('invoice_items', NEW.id, 'I', (SELECT branch_id FROM invoices WHERE id=NEW.invoice_id));
+END;
+CREATE TRIGGER IF NOT EXISTS trg_invoice_items_upd AFTER UPDATE ON invoice_items BEGIN
+  INSERT INTO change_log(entity, entity_id, op, branch_id)
+    VALUES ('invoice_items', NEW.id, 'U', (SELECT branch_id FROM invoices WHERE id=NEW.invoice_id));
+END;
+CREATE TRIGGER IF NOT EXISTS trg_invoice_items_del AFTER DELETE ON invoice_items BEGIN
+  INSERT INTO change_log(entity, entity_id, op, branch_id)
+    VALUES ('invoice_items', OLD.id, 'D', (SELECT branch_id FROM invoices WHERE id=OLD.invoice_id));
+END;
+
+-- Reporting rollups (see routes_reports.py). Kept current by the triggers
+-- below; `flask --app app reports backfill` rebuilds them from scratch.
+CREATE TABLE IF NOT EXISTS rollup_sales_daily (
+  day TEXT NOT NULL,             -- date(invoices.created_at)
+  branch_id INTEGER NOT NULL,
+  category TEXT NOT NULL,
+  model_number TEXT NOT NULL,    -- '' when unset
+  revenue REAL NOT NULL DEFAULT 0,
+  units REAL NOT NULL DEFAULT 0,
+  lines INTEGER NOT NULL DEFAULT 0,
+  PRIMARY KEY(day, branch_id, category, model_number)
+);
+
+CREATE TABLE IF NOT EXISTS rollup_production_daily (
+  day TEXT NOT NULL,             -- orders.order_date
+  branch TEXT NOT NULL,
+  category TEXT NOT NULL,
+  model_number TEXT NOT NULL,
+  units INTEGER NOT NULL DEFAULT 0,
+  PRIMARY KEY(day, branch, category, model_number)
+);
+
+CREATE TABLE IF NOT EXISTS rollup_orders_daily (
+  day TEXT NOT NULL,
+  branch TEXT NOT NULL,
+  status TEXT NOT NULL,
+  orders INTEGER NOT NULL DEFAULT 0,
+  PRIMARY KEY(day, branch, status)
+);
+
+-- sales: invoice_items joined to their invoice for branch/day
+CREATE TRIGGER IF NOT EXISTS trg_rollup_invoice_items_ins AFTER INSERT ON invoice_items BEGIN
+  INSERT INTO rollup_sales_daily(day, branch_id, category, model_number, revenue, units, lines)
+    SELECT IFNULL(date(i.created_at),''), IFNULL(i.branch_id,0), NEW.category, IFNULL(NEW.model_number,''),
+           IFNULL(NEW.line_total,0), IFNULL(NEW.qty,0), 1
+    FROM invoices i WHERE i.id=NEW.invoice_id
+  ON CONFLICT(day, branch_id, category, model_number) DO UPDATE SET
+    revenue=revenue+excluded.revenue, units=units+excluded.units, lines=lines+excluded.lines;
+END;
+CREATE TRIGGER IF NOT EXISTS trg_rollup_invoice_items_upd AFTER UPDATE ON invoice_items BEGIN
+  INSERT INTO rollup_sales_daily(day, branch_id, category, model_number, revenue, units, lines)
+    SELECT IFNULL(date(i.created_at),''), IFNULL(i.branch_id,0), OLD.category, IFNULL(OLD.model_number,''),
+           -IFNULL(OLD.line_total,0), -IFNULL(OLD.qty,0), -1
+    FROM invoices i WHERE i.id=OLD.invoice_id
+  ON CONFLICT(day, branch_id, category, model_number) DO UPDATE SET
+    revenue=revenue+excluded.revenue, units=units+excluded.units, lines=lines+excluded.lines;
+  INSERT INTO rollup_sales_daily(day, branch_id, category, model_number, revenue, units, lines)
+    SELECT IFNULL(date(i.created_at),''), IFNULL(i.branch_id,0), NEW.category, IFNULL(NEW.model_number,''),
+           IFNULL(NEW.line_total,0), IFNULL(NEW.qty,0), 1
+    FROM invoices i WHERE i.id=NEW.invoice_id
+  ON CONFLICT(day, branch_id, category, model_number) DO UPDATE SET
+    revenue=revenue+excluded.revenue, units=units+excluded.units, lines=lines+excluded.lines;
+END;
+-- no-op when the invoice itself is being deleted; trg_rollup_invoices_del already took the items out
+CREATE TRIGGER IF NOT EXISTS trg_rollup_invoice_items_del AFTER DELETE ON invoice_items BEGIN
+  INSERT INTO rollup_sales_daily(day, branch_id, category, model_number, revenue, units, lines)
+    SELECT IFNULL(date(i.created_at),''), IFNULL(i.branch_id,0), OLD.category, IFNULL(OLD.model_number,''),
+           -IFNULL(OLD.line_total,0), -IFNULL(OLD.qty,0), -1
+    FROM invoices i WHERE i.id=OLD.invoice_id
+  ON CONFLICT(day, branch_id, category, model_number) DO UPDATE SET
+    revenue=revenue+excluded.revenue, units=units+excluded.units, lines=lines+excluded.lines;
+END;
+CREATE TRIGGER IF NOT EXISTS trg_rollup_invoices_upd AFTER UPDATE OF branch_id, created_at ON invoices
+WHEN OLD.branch_id IS NOT NEW.branch_id OR date(OLD.created_at) IS NOT date(NEW.created_at) BEGIN
+  INSERT INTO rollup_sales_daily(day, branch_id, category, model_number, revenue, units, lines)
+    SELECT IFNULL(date(OLD.created_at),''), IFNULL(OLD.branch_id,0), ii.category, IFNULL(ii.model_number,''),
+           -IFNULL(ii.line_total,0), -IFNULL(ii.qty,0), -1
+    FROM invoice_items ii WHERE ii.invoice_id=OLD.id
+  ON CONFLICT(day, branch_id, category, model_number) DO UPDATE SET
+    revenue=revenue+excluded.revenue, units=units+excluded.units, lines=lines+excluded.lines;
+  INSERT INTO rollup_sales_daily(day, branch_id, category, model_number, revenue, units, lines)
+    SELECT IFNULL(date(NEW.created_at),''), IFNULL(NEW.branch_id,0), ii.category, IFNULL(ii.model_number,''),
+           IFNULL(ii.line_total,0), IFNULL(ii.qty,0), 1
+    FROM invoice_items ii WHERE ii.invoice_id=NEW.id
+  ON CONFLICT(day, branch_id, category, model_number) DO UPDATE SET
+    revenue=revenue+excluded.revenue, units=units+excluded.units, lines=lines+excluded.lines;
+END;
+CREATE TRIGGER IF NOT EXISTS trg_rollup_invoices_del BEFORE DELETE ON invoices BEGIN
+  INSERT INTO rollup_sales_daily(day, branch_id, category, model_number, revenue, units, lines)
+    SELECT IFNULL(date(OLD.created_at),''), IFNULL(OLD.branch_id,0), ii.category, IFNULL(ii.model_number,''),
+           -IFNULL(ii.line_total,0), -IFNULL(ii.qty,0), -1
+    FROM invoice_items ii WHERE ii.invoice_id=OLD.id
+  ON CONFLICT(day, branch_id, category, model_number) DO UPDATE SET
+    revenue=revenue+excluded.revenue, units=units+excluded.units, lines=lines+excluded.lines;
+END;
+
+-- production: order_items joined to their order for branch/day
+CREATE TRIGGER IF NOT EXISTS trg_rollup_order_items_ins AFTER INSERT ON order_items BEGIN
+  INSERT INTO rollup_production_daily(day, branch, category, model_number, units)
+    SELECT o.order_date, o.branch, NEW.category, IFNULL(NEW.model_number,''), 1 FROM orders o WHERE o.id=NEW.order_id
+  ON CONFLICT(day, branch, category, model_number) DO UPDATE SET units=units+excluded.units;
+END;
+CREATE TRIGGER IF NOT EXISTS trg_rollup_order_items_upd AFTER UPDATE ON order_items BEGIN
+  INSERT INTO rollup_production_daily(day, branch, category, model_number, units)
+    SELECT o.order_date, o.branch, OLD.category, IFNULL(OLD.model_number,''), -1 FROM orders o WHERE o.id=OLD.order_id
+  ON CONFLICT(day, branch, category, model_number) DO UPDATE SET units=units+excluded.units;
+  INSERT INTO rollup_production_daily(day, branch, category, model_number, units)
+    SELECT o.order_date, o.branch, NEW.category, IFNULL(NEW.model_number,''), 1 FROM orders o WHERE o.id=NEW.order_id
+  ON CONFLICT(day, branch, category, model_number) DO UPDATE SET units=units+excluded.units;
+END;
+CREATE TRIGGER IF NOT EXISTS trg_rollup_order_items_del AFTER DELETE ON order_items BEGIN
+  INSERT INTO rollup_production_daily(day, branch, category, model_number, units)
+    SELECT o.order_date, o.branch, OLD.category, IFNULL(OLD.model_number,''), -1 FROM orders o WHERE o.id=OLD.order_id
+  ON CONFLICT(day, branch, category, model_number) DO UPDATE SET units=units+excluded.units;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_rollup_orders_ins AFTER INSERT ON orders BEGIN
+  INSERT INTO rollup_orders_daily(day, branch, status, orders) VALUES (NEW.order_date, NEW.branch, NEW.status, 1)
+  ON CONFLICT(day, branch, status) DO UPDATE SET orders=orders+excluded.orders;
+END;
+CREATE TRIGGER IF NOT EXISTS trg_rollup_orders_upd AFTER UPDATE OF order_date, branch, status ON orders
+WHEN OLD.order_date IS NOT NEW.order_date OR OLD.branch IS NOT NEW.branch OR OLD.status IS NOT NEW.status BEGIN
+  INSERT INTO rollup_orders_daily(day, branch, status, orders) VALUES (OLD.order_date, OLD.branch, OLD.status, -1)
+  ON CONFLICT(day, branch, status) DO UPDATE SET orders=orders+excluded.orders;
+  INSERT INTO rollup_orders_daily(day, branch, status, orders) VALUES (NEW.order_date, NEW.branch, NEW.status, 1)
+  ON CONFLICT(day, branch, status) DO UPDATE SET orders=orders+excluded.orders;
+  INSERT INTO rollup_production_daily(day, branch, category, model_number, units)
+    SELECT OLD.order_date, OLD.branch, oi.category, IFNULL(oi.model_number,''), -1 FROM order_items oi
+    WHERE oi.order_id=OLD.id AND (OLD.order_date IS NOT NEW.order_date OR OLD.branch IS NOT NEW.branch)
+  ON CONFLICT(day, branch, category, model_number) DO UPDATE SET units=units+excluded.units;
+  INSERT INTO rollup_production_daily(day, branch, category, model_number, units)
+    SELECT NEW.order_date, NEW.branch, oi.category, IFNULL(oi.model_number,''), 1 FROM order_items oi
+    WHERE oi.order_id=NEW.id AND (OLD.order_date IS NOT NEW.order_date OR OLD.branch IS NOT NEW.branch)
+  ON CONFLICT(day, branch, category, model_number) DO UPDATE SET units=units+excluded.units;
+END;
+CREATE TRIGGER IF NOT EXISTS trg_rollup_orders_del BEFORE DELETE ON orders BEGIN
+  INSERT INTO rollup_orders_daily(day, branch, status, orders) VALUES (OLD.order_date, OLD.branch, OLD.status, -1)
+  ON CONFLICT(day, branch, status) DO UPDATE SET orders=orders+excluded.orders;
+  INSERT INTO rollup_production_daily(day, branch, category, model_number, units)
+    SELECT OLD.order_date, OLD.branch, oi.category, IFNULL(oi.model_number,''), -1 FROM order_items oi WHERE oi.order_id=OLD.id
+  ON CONFLICT(day, branch, category, model_number) DO UPDATE SET units=units+excluded.units;
+END;
 """
 
+# Columns the invoice routes write that older SCHEMA tables were created
+# without; added in place by migrate().
+ADDED_COLUMNS = {
+    "invoices": [("notes", "TEXT")],
+    "invoice_items": [("extra_note", "TEXT"), ("discount_type", "TEXT DEFAULT 'NONE'"),
+                      ("discount_value", "REAL DEFAULT 0"), ("tax_rate", "REAL DEFAULT 0")],
+}
+
+# Rows written before the triggers existed are logged once as inserts,
+# so a branch syncing from version 0 still gets the full history.
+SEED_CHANGE_LOG = (
+    """INSERT INTO change_log(entity, entity_id, op, branch)
+         SELECT 'orders', id, 'I', branch FROM orders ORDER BY id""",
+    """INSERT INTO change_log(entity, entity_id, op, branch)
+         SELECT 'order_items', oi.id, 'I', o.branch FROM order_items oi JOIN orders o ON o.id=oi.order_id ORDER BY oi.id""",
+    """INSERT INTO change_log(entity, entity_id, op, branch_id)
+         SELECT 'invoices', id, 'I', branch_id FROM invoices ORDER BY id""",
+    """INSERT INTO change_log(entity, entity_id, op, branch_id)
+         SELECT 'invoice_items', ii.id, 'I', i.branch_id FROM invoice_items ii JOIN invoices i ON i.id=ii.invoice_id ORDER BY ii.id""",
+)
+
+def seed_change_log(db):
+    # IMMEDIATE takes the write lock before the emptiness check, so a second
+    # worker waits and then sees the seed; a crash rolls the whole seed back
+    db.commit()
+    db.execute("BEGIN IMMEDIATE")
+    try:
+        if not db.execute("SELECT 1 FROM change_log LIMIT 1").fetchone():
+            for stmt in SEED_CHANGE_LOG:
+                db.execute(stmt)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
 def migrate():
     db = get_db()
     db.executescript(SCHEMA)
+    for table, cols in ADDED_COLUMNS.items():
+        have = {r[1] for r in db.execute(f"PRAGMA table_info({table})").fetchall()}
+        for col, decl in cols:
+            if col not in have:
+                db.execute(f"ALTER TABLE {table} ADD COLUMN {col} {decl}")
     for i in range(1, 51):
         got = db.execute("SELECT id FROM branches WHERE id=?", (i,)).fetchone()
         if not got:
             db.execute("INSERT INTO branches(id, created_at) VALUES (?, datetime('now'))", (i,))
     db.commit()
+    seed_change_log(db)
 
 def next_invoice_no(db):
     row = db.execute("SELECT COUNT(*) AS c FROM invoices").fetchone()
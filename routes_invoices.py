@@ -1,24 +1,112 @@
-from flask import Blueprint, render_template, request, redirect, url_for, flash
+from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify, session
 from decimal import Decimal, InvalidOperation
 from models import get_db
+from auth import require_api_login, is_retail
 
 bp_invoices = Blueprint("invoices", __name__)
 
 # -------- Utilities --------
 def as_int(val, default=0):
+    s = str(val).strip()
     try:
-        return int(str(val).strip())
+        return int(s)
+    except Exception:
+        pass
+    # REAL columns (models.SCHEMA qty) read back as "3.0"
+    try:
+        f = float(s)
+        return int(f) if f.is_integer() else default
     except Exception:
         return default
 
-def as_money(val, default=0):
-    s = (val or "").strip().replace(",", "")
+INVOICE_ITEM_TYPES = ("CUSTOM", "LOCAL_CUSTOM", "READY")
+INVOICE_CATEGORIES = ("ABAYA", "SHEILA")
+DISCOUNT_TYPES = ("NONE", "AMOUNT", "PERCENT")
+INVOICE_ITEM_FIELDS = ("item_type", "category", "model_number", "color", "extra_note",
+                       "qty", "unit_price", "discount_type", "discount_value", "tax_rate")
+
+def is_scalar(val):
+    # what a form or a JSON number/string can carry; JSON true/false/objects are not
+    return val is None or (isinstance(val, (str, int, float)) and not isinstance(val, bool))
+
+def is_item_id(val):
+    return isinstance(val, int) and not isinstance(val, bool)
+
+def as_text(val):
+    return ("" if val is None else str(val)).strip()
+
+def as_number(val, default=0):
+    """Decimal for a form/JSON value: default when blank, None when not a finite number."""
+    s = as_text(val).replace(",", "")
     if s == "":
         return Decimal(default)
     try:
-        return Decimal(s)
+        d = Decimal(s)
     except InvalidOperation:
-        return Decimal(default)
+        return None
+    return d if d.is_finite() else None
+
+def parse_invoice_item(f):
+    """Validate an item from a form or JSON dict -> (column values incl. line_total, error message)."""
+    if not all(is_scalar(f.get(k)) for k in INVOICE_ITEM_FIELDS):
+        return None, "Field values must be text or numbers."
+
+    item_type = as_text(f.get("item_type")).upper() or "READY"
+    if item_type not in INVOICE_ITEM_TYPES:
+        return None, "Unknown item type."
+    category = as_text(f.get("category")).upper() or "ABAYA"
+    if category not in INVOICE_CATEGORIES:
+        return None, "Choose category."
+    discount_type = as_text(f.get("discount_type")).upper() or "NONE"
+    if discount_type not in DISCOUNT_TYPES:
+        return None, "Unknown discount type."
+
+    qty = as_number(f.get("qty"), 1)
+    if qty is None or qty != qty.to_integral_value() or qty < 1:
+        return None, "Qty must be a whole number of 1 or more."
+    unit_price     = as_number(f.get("unit_price"), 0)
+    discount_value = as_number(f.get("discount_value"), 0)
+    tax_rate       = as_number(f.get("tax_rate"), 0)  # percent
+    for label, v in (("Unit price", unit_price), ("Discount", discount_value), ("Tax %", tax_rate)):
+        if v is None or v < 0:
+            return None, f"{label} must be a number of 0 or more."
+
+    model_number = as_text(f.get("model_number")) or None
+    color        = as_text(f.get("color")) or None
+    extra_note   = as_text(f.get("extra_note")) or None
+
+    # Total calculation
+    try:
+        line_subtotal = unit_price * qty
+        if discount_type == "AMOUNT":
+            after = max(Decimal("0"), line_subtotal - discount_value)
+        elif discount_type == "PERCENT":
+            pct = max(Decimal("0"), min(Decimal("100"), discount_value))
+            after = line_subtotal * (Decimal("1") - pct / Decimal("100"))
+        else:
+            after = line_subtotal
+        tax_amount = (after * (tax_rate / Decimal("100"))).quantize(Decimal("0.01"))
+        line_total = (after + tax_amount).quantize(Decimal("0.01"))
+    except InvalidOperation:  # beyond Decimal precision
+        return None, "Amounts are too large."
+
+    return {
+        "item_type": item_type, "category": category, "model_number": model_number,
+        "color": color, "extra_note": extra_note, "qty": int(qty),
+        "unit_price": float(unit_price), "discount_type": discount_type,
+        "discount_value": float(discount_value), "tax_rate": float(tax_rate),
+        "line_total": float(line_total),
+    }, None
+
+def insert_invoice_item(db, invoice_id, vals):
+    cols = ["invoice_id"] + list(vals)
+    db.execute(f"INSERT INTO invoice_items ({', '.join(cols)}) VALUES ({','.join('?' * len(cols))})",
+               [invoice_id] + list(vals.values()))
+
+def update_invoice_item(db, invoice_id, item_id, vals):
+    sets = ", ".join(f"{k}=?" for k in vals)
+    db.execute(f"UPDATE invoice_items SET {sets} WHERE id=? AND invoice_id=?",
+               list(vals.values()) + [item_id, invoice_id])
 
 
 # Ensure base tables exist (idempotent)
@@ -112,50 +200,11 @@ def invoice_detail(invoice_id):
 
         # ---- Add item ----
         if action == "add-item":
-            f = request.form
-
-            # Parse safely
-            qty            = as_int(f.get("qty"), 1)
-            unit_price     = as_money(f.get("unit_price"), 0)
-            discount_type  = (f.get("discount_type") or "NONE").strip().upper()
-            if discount_type not in ("NONE", "AMOUNT", "PERCENT"):
-                discount_type = "NONE"
-            discount_value = as_money(f.get("discount_value"), 0)
-            tax_rate       = as_money(f.get("tax_rate"), 0)  # percent
-
-            item_type   = (f.get("item_type") or "READY").strip().upper()
-            if item_type not in ("CUSTOM", "LOCAL_CUSTOM", "READY"):
-                item_type = "READY"
-            category    = (f.get("category") or "ABAYA").strip().upper()
-            if category not in ("ABAYA", "SHEILA"):
-                category = "ABAYA"
-            model_number = (f.get("model_number") or "").strip() or None
-            color        = (f.get("color") or "").strip() or None
-            extra_note   = (f.get("extra_note") or "").strip() or None
-
-            # Total calculation
-            line_subtotal = unit_price * qty
-            if discount_type == "AMOUNT":
-                after = max(Decimal("0"), line_subtotal - discount_value)
-            elif discount_type == "PERCENT":
-                pct = max(Decimal("0"), min(Decimal("100"), discount_value))
-                after = line_subtotal * (Decimal("1") - pct / Decimal("100"))
-            else:
-                after = line_subtotal
-            tax_amount = (after * (tax_rate / Decimal("100"))).quantize(Decimal("0.01"))
-            line_total = (after + tax_amount).quantize(Decimal("0.01"))
-
-            # Insert
-            db.execute("""
-                INSERT INTO invoice_items (
-                  invoice_id, item_type, category, model_number, color, extra_note,
-                  qty, unit_price, discount_type, discount_value, tax_rate, line_total
-                ) VALUES (?,?,?,?,?,?,?,?,?,?,?,?)
-            """, (
-                invoice_id, item_type, category, model_number, color, extra_note,
-                int(qty), float(unit_price), discount_type, float(discount_value),
-                float(tax_rate), float(line_total)
-            ))
+            vals, err = parse_invoice_item(request.form)
+            if err:
+                flash(err)
+                return redirect(url_for("invoices.invoice_detail", invoice_id=invoice_id))
+            insert_invoice_item(db, invoice_id, vals)
             db.commit()
             flash("Item added to invoice.")
             return redirect(url_for("invoices.invoice_detail", invoice_id=invoice_id))
@@ -197,3 +246,64 @@ def delete_invoice(invoice_id):
     db.commit()
     flash("Invoice deleted.")
     return redirect(url_for("invoices.invoice_list"))
+
+
+# -------- Batch item API (JSON) --------
+@bp_invoices.route("/api/invoices/<int:invoice_id>/items", methods=["POST"])
+@require_api_login
+def invoice_items_batch(invoice_id):
+    """Same contract as /api/orders/<id>/items: a list of create/update/delete
+    ops applied in one transaction, answered with the full item set."""
+    db = get_db()
+    ensure_tables(db)
+    inv = db.execute("SELECT id, branch_id, status FROM invoices WHERE id=?", (invoice_id,)).fetchone()
+    if not inv or (is_retail() and inv["branch_id"] != session.get("retail_branch_id")):
+        return jsonify({"error": "Invoice not found."}), 404
+    if is_retail() and (inv["status"] or "DRAFT") != "DRAFT":
+        return jsonify({"error": "Retail cannot change items when not DRAFT."}), 403
+
+    body = request.get_json(silent=True)
+    ops = body.get("ops") if isinstance(body, dict) else body
+    if not isinstance(ops, list):
+        return jsonify({"error": "Expected a JSON array of item ops."}), 400
+
+    existing = {r["id"]: r for r in db.execute("SELECT * FROM invoice_items WHERE invoice_id=?", (invoice_id,)).fetchall()}
+    plan, errors = [], []
+    for i, op in enumerate(ops):
+        kind = op.get("op") if isinstance(op, dict) else None
+        if kind not in ("create", "update", "delete"):
+            errors.append({"index": i, "error": "op must be create, update or delete."})
+            continue
+        item_id = None
+        if kind != "create":
+            item_id = op.get("id")
+            if not is_item_id(item_id) or item_id not in existing:
+                errors.append({"index": i, "error": "Item not found."})
+                continue
+        vals, err = None, None
+        if kind == "create":
+            vals, err = parse_invoice_item(op)
+        elif kind == "update":
+            vals, err = parse_invoice_item({**dict(existing[item_id]), **op})
+        if err:
+            errors.append({"index": i, "error": err})
+            continue
+        plan.append((kind, item_id, vals))
+    if errors:
+        return jsonify({"errors": errors}), 400
+
+    try:
+        for kind, item_id, vals in plan:
+            if kind == "create":
+                insert_invoice_item(db, invoice_id, vals)
+            elif kind == "update":
+                update_invoice_item(db, invoice_id, item_id, vals)
+            else:
+                db.execute("DELETE FROM invoice_items WHERE id=? AND invoice_id=?", (item_id, invoice_id))
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
+    items = db.execute("SELECT * FROM invoice_items WHERE invoice_id=? ORDER BY id DESC", (invoice_id,)).fetchall()
+    return jsonify({"invoice_id": invoice_id, "items": [dict(r) for r in items]})
@@ -1,11 +1,54 @@
-from flask import Blueprint, render_template, request, redirect, url_for, flash, session
+from itertools import groupby
+from flask import Blueprint, render_template, request, redirect, url_for, flash, session, jsonify, current_app, stream_with_context
 from models import get_db, migrate
-from auth import require_login, is_factory, is_retail
+from auth import require_login, require_api_login, is_factory, is_retail
 
 bp_orders = Blueprint('orders_bp', __name__)
 
 STATUS_CHOICES = ["DRAFT","SENT_TO_FACTORY","IN_PRODUCTION","READY","DELIVERED","CANCELLED"]
 ITEM_CATEGORIES = ["SHEILA","ABAYA"]
+ITEM_SPEC_FIELDS = {
+    "SHEILA": ["sheila_fabric","height_cm","width_cm","logo_color"],
+    "ABAYA": ["abaya_fabric","size","upper_width_cm","lower_width_cm","sleeve_width_cm","sleeve_height_cm","logo"],
+}
+ORDER_ITEM_FIELDS = ["category","model_number","color","extra_note"] + [k for c in ITEM_CATEGORIES for k in ITEM_SPEC_FIELDS[c]]
+PRINT_BUFFER = 200  # template events per chunk sent to the client
+PRINT_DEFAULT_STATUS = "IN_PRODUCTION"  # an unfiltered print is the current cutting sheet, not all history
+
+def is_scalar(val):
+    # what a form or a JSON number/string can carry; JSON true/false/objects are not
+    return val is None or (isinstance(val, (str, int, float)) and not isinstance(val, bool))
+
+def is_item_id(val):
+    return isinstance(val, int) and not isinstance(val, bool)
+
+def parse_order_item(f):
+    """Validate an item from a form or JSON dict -> (column values, error message)."""
+    if not all(is_scalar(f.get(k)) for k in ORDER_ITEM_FIELDS):
+        return None, "Field values must be text or numbers."
+    cat = f.get("category")
+    if cat not in ITEM_CATEGORIES:
+        return None, "Choose category."
+    vals = {
+        "category": cat,
+        "model_number": f.get("model_number") or None,
+        "color": f.get("color") or None,
+        "extra_note": f.get("extra_note") or None,
+    }
+    for c, fields in ITEM_SPEC_FIELDS.items():
+        for k in fields:
+            vals[k] = f.get(k) if c == cat else None
+    return vals, None
+
+def insert_order_item(db, order_id, vals):
+    cols = ["order_id"] + list(vals)
+    db.execute(f"INSERT INTO order_items({','.join(cols)}) VALUES ({','.join('?' * len(cols))})",
+               [order_id] + list(vals.values()))
+
+def update_order_item(db, order_id, item_id, vals):
+    sets = ",".join(f"{k}=?" for k in vals)
+    db.execute(f"UPDATE order_items SET {sets} WHERE id=? AND order_id=?",
+               list(vals.values()) + [item_id, order_id])
 
 @bp_orders.route("/orders", methods=["GET","POST"])
 @require_login
@@ -100,30 +143,10 @@ def order_detail(order_id):
             if is_retail() and retail_locked:
                 flash("Retail cannot add items when not DRAFT."); return redirect(url_for("orders_bp.order_detail", order_id=order_id))
 
-            cat = request.form.get("category")
-            if cat not in ITEM_CATEGORIES:
-                flash("Choose category."); return redirect(url_for("orders_bp.order_detail", order_id=order_id))
-            common = {
-                "model_number": request.form.get("model_number") or None,
-                "color": request.form.get("color") or None,
-                "extra_note": request.form.get("extra_note") or None,
-            }
-            if cat == "SHEILA":
-                db.execute("""
-                    INSERT INTO order_items(order_id,category,model_number,color,extra_note,sheila_fabric,height_cm,width_cm,logo_color)
-                    VALUES (?,?,?,?,?,?,?,?,?)
-                """, (order_id, cat, common["model_number"], common["color"], common["extra_note"],
-                        request.form.get("sheila_fabric"), request.form.get("height_cm"),
-                        request.form.get("width_cm"), request.form.get("logo_color")))
-            else:
-                db.execute("""
-                    INSERT INTO order_items(order_id,category,model_number,color,extra_note,abaya_fabric,size,upper_width_cm,lower_width_cm,sleeve_width_cm,sleeve_height_cm,logo)
-                    VALUES (?,?,?,?,?,?,?,?,?,?,?,?)
-                """, (order_id, cat, common["model_number"], common["color"], common["extra_note"],
-                        request.form.get("abaya_fabric"), request.form.get("size"),
-                        request.form.get("upper_width_cm"), request.form.get("lower_width_cm"),
-                        request.form.get("sleeve_width_cm"), request.form.get("sleeve_height_cm"),
-                        request.form.get("logo")))
+            vals, err = parse_order_item(request.form)
+            if err:
+                flash(err); return redirect(url_for("orders_bp.order_detail", order_id=order_id))
+            insert_order_item(db, order_id, vals)
             db.commit()
             flash("Item added.")
             return redirect(url_for("orders_bp.order_detail", order_id=order_id))
@@ -142,3 +165,123 @@ def order_detail(order_id):
     return render_template("order_form.html",
                            order=order, items=items, statuses=STATUS_CHOICES, branches=branches,
                            retail_locked=retail_locked, is_factory=is_factory)
+
+@bp_orders.route("/api/orders/<int:order_id>/items", methods=["POST"])
+@require_api_login
+def order_items_batch(order_id):
+    """Apply a list of item ops in one transaction and return the item set.
+
+    Body: [{"op": "create", ...fields}, {"op": "update", "id": 5, ...fields},
+    {"op": "delete", "id": 6}] (or {"ops": [...]}). Updates merge the given
+    fields over the stored item. Nothing is written if any op is invalid.
+    """
+    db = get_db()
+    order = db.execute("SELECT * FROM orders WHERE id=?", (order_id,)).fetchone()
+    if not order or (is_retail() and order["branch"] != (session.get("retail_branch_name") or "-")):
+        return jsonify({"error": "Order not found."}), 404
+    if is_retail() and order["status"] != "DRAFT":
+        return jsonify({"error": "Retail cannot change items when not DRAFT."}), 403
+
+    body = request.get_json(silent=True)
+    ops = body.get("ops") if isinstance(body, dict) else body
+    if not isinstance(ops, list):
+        return jsonify({"error": "Expected a JSON array of item ops."}), 400
+
+    existing = {r["id"]: r for r in db.execute("SELECT * FROM order_items WHERE order_id=?", (order_id,)).fetchall()}
+    plan, errors = [], []
+    for i, op in enumerate(ops):
+        kind = op.get("op") if isinstance(op, dict) else None
+        if kind not in ("create", "update", "delete"):
+            errors.append({"index": i, "error": "op must be create, update or delete."}); continue
+        item_id = None
+        if kind != "create":
+            item_id = op.get("id")
+            if not is_item_id(item_id) or item_id not in existing:
+                errors.append({"index": i, "error": "Item not found."}); continue
+        vals = None
+        if kind == "create":
+            vals, err = parse_order_item(op)
+        elif kind == "update":
+            vals, err = parse_order_item({**dict(existing[item_id]), **op})
+        else:
+            err = None
+        if err:
+            errors.append({"index": i, "error": err}); continue
+        plan.append((kind, item_id, vals))
+    if errors:
+        return jsonify({"errors": errors}), 400
+
+    try:
+        for kind, item_id, vals in plan:
+            if kind == "create":
+                insert_order_item(db, order_id, vals)
+            elif kind == "update":
+                update_order_item(db, order_id, item_id, vals)
+            else:
+                db.execute("DELETE FROM order_items WHERE id=? AND order_id=?", (item_id, order_id))
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
+    items = db.execute("SELECT * FROM order_items WHERE order_id=? ORDER BY id DESC", (order_id,)).fetchall()
+    return jsonify({"order_id": order_id, "items": [dict(r) for r in items]})
+
+def print_query(where):
+    # orders in rowid order, items via idx_order_items_order(order_id, id): rows
+    # come back already in ORDER BY order, with no temp B-tree to build first
+    return f"""
+        SELECT o.id AS order_id, o.order_no, o.branch, o.order_date, o.status, o.notes,
+               oi.id AS item_id, {", ".join("oi." + c for c in ORDER_ITEM_FIELDS)}
+        FROM orders o LEFT JOIN order_items oi ON oi.order_id=o.id
+        WHERE {" AND ".join(where)}
+        ORDER BY o.id, oi.id
+    """
+
+@bp_orders.route("/orders/print")
+@require_login
+def orders_print():
+    """One print document for many orders: ?status=&branch=&from=&to=&q=&ids=1,2,3.
+    With no filter at all it prints PRINT_DEFAULT_STATUS orders.
+
+    Orders and their items come from a single ordered join that is consumed
+    lazily while the template streams, so large cutting sheets start arriving
+    at once and never sit in memory as a whole.
+    """
+    db = get_db(); migrate()
+    f = {k: (request.args.get(k) or "").strip() for k in ("status", "branch", "from", "to", "q")}
+    ids = [int(x) for x in ",".join(request.args.getlist("ids")).split(",") if x.strip().isdigit()]
+    if not ids and not any(f.values()):
+        f["status"] = PRINT_DEFAULT_STATUS
+
+    where, params = ["1=1"], []
+    if is_retail():
+        where.append("o.branch=?"); params.append(session.get("retail_branch_name") or "-")
+    elif f["branch"]:
+        where.append("o.branch=?"); params.append(f["branch"])
+    if f["status"]:
+        where.append("o.status=?"); params.append(f["status"])
+    if f["from"]:
+        where.append("o.order_date>=?"); params.append(f["from"])
+    if f["to"]:
+        where.append("o.order_date<=?"); params.append(f["to"])
+    if f["q"]:
+        like = f"%{f['q']}%"
+        where.append("(o.order_no LIKE ? OR o.branch LIKE ? OR o.notes LIKE ? OR CAST(o.id AS TEXT) LIKE ?)")
+        params += [like, like, like, like]
+    if ids:
+        where.append(f"o.id IN ({','.join('?' * len(ids))})"); params += ids
+
+    cur = db.execute(print_query(where), params)
+
+    def groups():
+        for _, rows in groupby(cur, key=lambda r: r["order_id"]):
+            rows = list(rows)
+            yield rows[0], [r for r in rows if r["item_id"] is not None]
+
+    context = {"groups": groups(), "f": f, "ids": ",".join(map(str, ids)), "statuses": STATUS_CHOICES}
+    app = current_app._get_current_object()
+    app.update_template_context(context)
+    stream = app.jinja_env.get_template("orders_print.html").stream(context)
+    stream.enable_buffering(PRINT_BUFFER)
+    return current_app.response_class(stream_with_context(stream), mimetype="text/html")
@@ -0,0 +1,107 @@
+import csv, io
+from datetime import date
+import click
+from flask import Blueprint, render_template, request, jsonify, Response
+from models import get_db, migrate
+from auth import require_login, require_factory
+
+bp_reports = Blueprint("reports_bp", __name__, cli_group="reports")
+
+# Every report reads the rollup_* tables only; cost follows the date range,
+# not the size of orders/invoices.
+REPORTS = {
+    "revenue_daily": """
+        SELECT s.day, s.branch_id, COALESCE(b.name, '') AS branch_name,
+               SUM(s.revenue) AS revenue, SUM(s.units) AS units
+        FROM rollup_sales_daily s LEFT JOIN branches b ON b.id=s.branch_id
+        WHERE s.day BETWEEN ? AND ?
+        GROUP BY s.day, s.branch_id ORDER BY s.day, s.branch_id""",
+    "revenue_by_branch": """
+        SELECT s.branch_id, COALESCE(b.name, '') AS branch_name,
+               SUM(s.revenue) AS revenue, SUM(s.units) AS units, SUM(s.lines) AS lines
+        FROM rollup_sales_daily s LEFT JOIN branches b ON b.id=s.branch_id
+        WHERE s.day BETWEEN ? AND ?
+        GROUP BY s.branch_id HAVING SUM(s.lines) > 0 ORDER BY revenue DESC""",
+    "sales_by_model": """
+        SELECT category, model_number, SUM(units) AS units, SUM(revenue) AS revenue
+        FROM rollup_sales_daily WHERE day BETWEEN ? AND ?
+        GROUP BY category, model_number HAVING SUM(lines) > 0 ORDER BY units DESC""",
+    "production_by_model": """
+        SELECT category, model_number, SUM(units) AS units
+        FROM rollup_production_daily WHERE day BETWEEN ? AND ?
+        GROUP BY category, model_number HAVING SUM(units) > 0 ORDER BY units DESC""",
+    "orders_by_status": """
+        SELECT status, SUM(orders) AS orders
+        FROM rollup_orders_daily WHERE day BETWEEN ? AND ?
+        GROUP BY status HAVING SUM(orders) > 0 ORDER BY orders DESC""",
+}
+
+BACKFILL = r"""
+BEGIN;
+DELETE FROM rollup_sales_daily;
+DELETE FROM rollup_production_daily;
+DELETE FROM rollup_orders_daily;
+INSERT INTO rollup_sales_daily(day, branch_id, category, model_number, revenue, units, lines)
+  SELECT IFNULL(date(i.created_at),''), IFNULL(i.branch_id,0), ii.category, IFNULL(ii.model_number,''),
+         SUM(IFNULL(ii.line_total,0)), SUM(IFNULL(ii.qty,0)), COUNT(*)
+  FROM invoice_items ii JOIN invoices i ON i.id=ii.invoice_id
+  GROUP BY 1, 2, 3, 4;
+INSERT INTO rollup_production_daily(day, branch, category, model_number, units)
+  SELECT o.order_date, o.branch, oi.category, IFNULL(oi.model_number,''), COUNT(*)
+  FROM order_items oi JOIN orders o ON o.id=oi.order_id
+  GROUP BY 1, 2, 3, 4;
+INSERT INTO rollup_orders_daily(day, branch, status, orders)
+  SELECT order_date, branch, status, COUNT(*) FROM orders GROUP BY 1, 2, 3;
+COMMIT;
+"""
+
+def backfill_rollups(db):
+    """Rebuild all rollup tables from the raw tables in one transaction."""
+    db.executescript(BACKFILL)
+
+def _date_range():
+    today = date.today()
+    d_from = (request.args.get("from") or "").strip() or today.replace(month=1, day=1).isoformat()
+    d_to = (request.args.get("to") or "").strip() or today.isoformat()
+    return d_from, d_to
+
+def run_report(db, name, d_from, d_to):
+    return db.execute(REPORTS[name], (d_from, d_to)).fetchall()
+
+@bp_reports.route("/reports")
+@require_login
+@require_factory
+def reports():
+    db = get_db()  # schema is migrated once at startup (app.py)
+    d_from, d_to = _date_range()
+    data = {name: run_report(db, name, d_from, d_to) for name in REPORTS if name != "revenue_daily"}
+    return render_template("reports.html", d_from=d_from, d_to=d_to, reports=list(REPORTS), **data)
+
+@bp_reports.route("/reports/data")
+@require_login
+@require_factory
+def reports_data():
+    """?report=<name>&from=YYYY-MM-DD&to=YYYY-MM-DD&format=csv|json (defaults: year to date, json)."""
+    name = request.args.get("report") or "revenue_daily"
+    if name not in REPORTS:
+        return jsonify({"error": "Unknown report.", "reports": list(REPORTS)}), 400
+    db = get_db()  # schema is migrated once at startup (app.py)
+    d_from, d_to = _date_range()
+    rows = run_report(db, name, d_from, d_to)
+
+    if request.args.get("format") == "csv":
+        buf = io.StringIO()
+        w = csv.writer(buf)
+        if rows:
+            w.writerow(rows[0].keys())
+        w.writerows(tuple(r) for r in rows)
+        return Response(buf.getvalue(), mimetype="text/csv",
+                        headers={"Content-Disposition": f"attachment; filename={name}_{d_from}_{d_to}.csv"})
+    return jsonify({"report": name, "from": d_from, "to": d_to, "rows": [dict(r) for r in rows]})
+
+@bp_reports.cli.command("backfill")
+def backfill_command():
+    """Build the reporting rollups for existing orders and invoices."""
+    migrate()
+    backfill_rollups(get_db())
+    click.echo("Rollup tables rebuilt.")
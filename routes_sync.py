@@ -0,0 +1,85 @@
+from flask import Blueprint, request, jsonify, session
+from models import get_db
+from auth import require_api_login, is_retail
+
+bp_sync = Blueprint("sync_bp", __name__)
+
+DEFAULT_LIMIT = 200
+MAX_LIMIT = 1000
+
+# entity -> query for the current rows of a set of ids (placeholder filled with ?,?,..)
+ENTITY_QUERIES = {
+    "orders": "SELECT o.*, o.branch AS _branch, NULL AS _branch_id FROM orders o WHERE o.id IN ({})",
+    "order_items": "SELECT oi.*, o.branch AS _branch, NULL AS _branch_id FROM order_items oi "
+                   "JOIN orders o ON o.id=oi.order_id WHERE oi.id IN ({})",
+    "invoices": "SELECT i.*, NULL AS _branch, i.branch_id AS _branch_id FROM invoices i WHERE i.id IN ({})",
+    "invoice_items": "SELECT ii.*, NULL AS _branch, i.branch_id AS _branch_id FROM invoice_items ii "
+                     "JOIN invoices i ON i.id=ii.invoice_id WHERE ii.id IN ({})",
+}
+
+def _scope():
+    """(branch name, branch id) for a retail session, (None, None) for factory."""
+    if is_retail():
+        return session.get("retail_branch_name") or "-", session.get("retail_branch_id")
+    return None, None
+
+def _visible(row, branch, branch_id):
+    if branch is None and branch_id is None:
+        return True
+    return row["_branch"] == branch if row["_branch"] is not None else row["_branch_id"] == branch_id
+
+# -------- Change feed --------
+@bp_sync.route("/api/sync/changes")
+@require_api_login
+def changes():
+    """Everything that changed after ?since=<version>, one entry per entity row.
+
+    Entries carry the row's current state ("upsert") or a tombstone ("delete")
+    when the row is gone or no longer belongs to the caller's branch. Clients
+    store `next` and pass it as `since` on the next poll until `has_more` is false.
+    """
+    db = get_db()  # schema is migrated once at startup (app.py), not per poll
+    try:
+        since = max(0, int(request.args.get("since", 0)))
+        limit = int(request.args.get("limit", DEFAULT_LIMIT))
+    except ValueError:
+        return jsonify({"error": "since and limit must be integers."}), 400
+    limit = max(1, min(MAX_LIMIT, limit))
+
+    branch, branch_id = _scope()
+    sql = "SELECT version, entity, entity_id FROM change_log WHERE version > ?"
+    params = [since]
+    if branch is not None:
+        sql += " AND (branch = ? OR branch_id = ?)"
+        params += [branch, branch_id]
+    sql += " ORDER BY version LIMIT ?"
+    params.append(limit + 1)
+    log = db.execute(sql, params).fetchall()
+
+    has_more = len(log) > limit
+    log = log[:limit]
+    next_version = log[-1]["version"] if log else since
+
+    # Collapse repeated writes to the same row; the latest version wins.
+    latest = {}
+    for r in log:
+        latest[(r["entity"], r["entity_id"])] = r["version"]
+
+    current = {}
+    for entity, query in ENTITY_QUERIES.items():
+        ids = [eid for (ent, eid) in latest if ent == entity]
+        if not ids:
+            continue
+        for row in db.execute(query.format(",".join("?" * len(ids))), ids).fetchall():
+            current[(entity, row["id"])] = row
+
+    out = []
+    for (entity, eid), version in sorted(latest.items(), key=lambda kv: kv[1]):
+        row = current.get((entity, eid))
+        if row is not None and _visible(row, branch, branch_id):
+            data = {k: row[k] for k in row.keys() if not k.startswith("_")}
+            out.append({"version": version, "entity": entity, "id": eid, "op": "upsert", "data": data})
+        else:
+            out.append({"version": version, "entity": entity, "id": eid, "op": "delete", "data": None})
+
+    return jsonify({"since": since, "next": next_version, "has_more": has_more, "changes": out})
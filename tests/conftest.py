@@ -0,0 +1,43 @@
+import os, sys, tempfile
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+# app.py migrates the DB and builds assets at import; keep both out of the source tree
+_scratch = tempfile.mkdtemp(prefix="akbros-test-")
+os.environ.setdefault("ORDER_DB", os.path.join(_scratch, "startup.db"))
+os.environ.setdefault("ASSET_CACHE_DIR", os.path.join(_scratch, "assets"))
+
+import models
+from app import app as flask_app
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    monkeypatch.setattr(models, "DB_PATH", str(tmp_path / "orders.db"))
+    flask_app.config["TESTING"] = True
+    with flask_app.app_context():
+        models.migrate()
+    return flask_app
+
+
+@pytest.fixture
+def db(app):
+    with app.app_context():
+        yield models.get_db()
+
+
+@pytest.fixture
+def factory(app):
+    c = app.test_client()
+    c.post("/login/factory", data={"passcode": os.environ.get("ADMIN_PASSCODE", "HKGOF2025@")})
+    return c
+
+
+def as_retail(client, branch_id, branch_name):
+    with client.session_transaction() as s:
+        s["authed"] = True
+        s["role"] = "retail"
+        s["retail_branch_id"] = branch_id
+        s["retail_branch_name"] = branch_name
+    return client
@@ -0,0 +1,48 @@
+import os, stat
+import assets
+from jinja2 import FileSystemBytecodeCache
+
+
+def test_bytecode_cache_lives_in_private_cache_dir(app):
+    bc = app.jinja_env.bytecode_cache
+    assert isinstance(bc, FileSystemBytecodeCache)
+    assert bc.directory == os.path.join(os.environ["ASSET_CACHE_DIR"], "jinja")
+    assert any(f.endswith(".cache") for f in os.listdir(bc.directory))
+    for path in (os.environ["ASSET_CACHE_DIR"], bc.directory):
+        st = os.stat(path)
+        assert st.st_uid == os.getuid() and stat.S_IMODE(st.st_mode) == 0o700
+
+
+def test_cache_dir_is_made_private(app, tmp_path, monkeypatch):
+    loose = tmp_path / "loose"
+    loose.mkdir(mode=0o777)
+    os.chmod(loose, 0o777)
+    monkeypatch.setenv("ASSET_CACHE_DIR", str(loose))
+    assets.cache_dir(app)
+    assert stat.S_IMODE(os.stat(loose).st_mode) == 0o700
+
+
+def test_fingerprinted_static_is_immutable_and_precompressed(factory):
+    entry = assets.MANIFEST["style.css"]
+    r = factory.get(f"/static/style.css?v={entry['hash']}", headers={"Accept-Encoding": "gzip"})
+    assert r.headers["Content-Encoding"] == "gzip"
+    assert "immutable" in r.headers["Cache-Control"]
+    assert len(r.data) == entry["gz_size"]
+
+
+def test_large_html_is_compressed(factory):
+    for i in range(40):
+        factory.post("/orders", data={"order_no": f"X{i}", "branch": "B"})
+    raw = len(factory.get("/orders").data)
+    r = factory.get("/orders", headers={"Accept-Encoding": "gzip"})
+    assert r.headers["Content-Encoding"] == "gzip" and len(r.data) < raw
+
+
+def test_truncated_precompressed_file_is_rebuilt(app):
+    path = assets.MANIFEST["style.css"]["gz"]
+    with open(path, "wb") as fh:
+        fh.write(b"\x1f\x8b")  # what a crash mid-write used to leave behind
+    assets.build_static(app)
+    assert os.path.getsize(path) == assets.MANIFEST["style.css"]["gz_size"]
+    leftovers = [f for f in os.listdir(os.path.dirname(path)) if f.startswith(".tmp-")]
+    assert leftovers == []
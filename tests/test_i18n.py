@@ -0,0 +1,15 @@
+from app import t
+
+
+def test_t_outside_before_request_uses_session(app):
+    with app.test_request_context("/"):
+        assert t("home_orders") == "Orders"
+    with app.test_request_context("/") as ctx:
+        ctx.session["lang"] = "ar"
+        assert t("home_orders") == "الطلبات"
+        assert t("no_such_label") == "no_such_label"
+
+
+def test_t_in_request_follows_language(factory):
+    factory.get("/lang/ar")
+    assert "الطلبات" in factory.get("/").data.decode()
@@ -0,0 +1,105 @@
+import pytest
+from conftest import as_retail
+
+
+@pytest.fixture
+def invoice(db):
+    db.execute("INSERT INTO invoices(id, branch_id) VALUES (1, 3)")
+    db.commit()
+    return 1
+
+
+def test_invoice_update_keeps_unsent_fields(factory, invoice):
+    r = factory.post("/api/invoices/1/items", json=[
+        {"op": "create", "qty": 3, "unit_price": 10, "tax_rate": 5, "model_number": "M7", "discount_type": "AMOUNT", "discount_value": 1}])
+    assert r.status_code == 200
+    before = r.json["items"][0]
+    assert before["qty"] == 3 and before["line_total"] == pytest.approx(30.45)
+
+    r = factory.post("/api/invoices/1/items", json=[{"op": "update", "id": before["id"], "unit_price": 12}])
+    assert r.status_code == 200
+    after = r.json["items"][0]
+    assert after["unit_price"] == 12
+    assert after["line_total"] == pytest.approx(36.75)  # (3*12 - 1) * 1.05
+    for k in ("qty", "tax_rate", "model_number", "discount_type", "discount_value", "category", "item_type"):
+        assert after[k] == before[k], k
+
+
+def test_order_update_keeps_unsent_fields(factory):
+    factory.post("/orders", data={"order_no": "A1", "branch": "Jeddah"})
+    r = factory.post("/api/orders/1/items", json=[{"op": "create", "category": "ABAYA", "size": "52", "logo": "L"}])
+    item = r.json["items"][0]
+    r = factory.post("/api/orders/1/items", json=[{"op": "update", "id": item["id"], "color": "black"}])
+    assert r.json["items"][0] == {**item, "color": "black"}
+
+
+def test_invalid_op_applies_nothing(factory):
+    factory.post("/orders", data={"order_no": "A1", "branch": "Jeddah"})
+    r = factory.post("/api/orders/1/items", json=[{"op": "create", "category": "ABAYA"}, {"op": "create"}])
+    assert r.status_code == 400 and r.json["errors"][0]["index"] == 1
+    assert factory.post("/api/orders/1/items", json=[]).json["items"] == []
+
+
+def test_invoice_api_is_scoped_to_retail_branch(app, factory, invoice, db):
+    factory.post("/api/invoices/1/items", json=[{"op": "create", "qty": 1}])
+    other = as_retail(app.test_client(), 9, "Branch 9")
+    assert other.post("/api/invoices/1/items", json=[{"op": "delete", "id": 1}]).status_code == 404
+
+    own = as_retail(app.test_client(), 3, "Branch 3")
+    assert own.post("/api/invoices/1/items", json=[]).status_code == 200
+    db.execute("UPDATE invoices SET status='FINAL' WHERE id=1"); db.commit()
+    assert own.post("/api/invoices/1/items", json=[{"op": "delete", "id": 1}]).status_code == 403
+    assert db.execute("SELECT COUNT(*) FROM invoice_items").fetchone()[0] == 1
+
+
+def test_order_api_is_scoped_to_retail_branch(app, factory):
+    factory.post("/orders", data={"order_no": "A1", "branch": "Jeddah"})
+    other = as_retail(app.test_client(), 2, "Riyadh")
+    assert other.post("/api/orders/1/items", json=[]).status_code == 404
+
+
+@pytest.mark.parametrize("item, error", [
+    ({"category": "HAT"}, "Choose category."),
+    ({"item_type": "x"}, "Unknown item type."),
+    ({"discount_type": "SOME"}, "Unknown discount type."),
+    ({"qty": "abc"}, "Qty must be a whole number of 1 or more."),
+    ({"qty": 2.5}, "Qty must be a whole number of 1 or more."),
+    ({"qty": 0}, "Qty must be a whole number of 1 or more."),
+    ({"unit_price": "zz"}, "Unit price must be a number of 0 or more."),
+    ({"unit_price": "NaN"}, "Unit price must be a number of 0 or more."),
+    ({"unit_price": "Infinity"}, "Unit price must be a number of 0 or more."),
+    ({"tax_rate": -5}, "Tax % must be a number of 0 or more."),
+    ({"unit_price": "1e40"}, "Amounts are too large."),
+])
+def test_invoice_api_rejects_invalid_items(factory, invoice, db, item, error):
+    r = factory.post("/api/invoices/1/items", json=[{"op": "create", "qty": 1}, {"op": "create", **item}])
+    assert r.status_code == 400
+    assert r.json["errors"] == [{"index": 1, "error": error}]
+    assert db.execute("SELECT COUNT(*) FROM invoice_items").fetchone()[0] == 0
+
+
+def test_invoice_form_uses_same_validation(factory, invoice, db):
+    factory.post("/invoices/1", data={"action": "add-item", "category": "HAT", "qty": "1"})
+    assert db.execute("SELECT COUNT(*) FROM invoice_items").fetchone()[0] == 0
+    factory.post("/invoices/1", data={"action": "add-item", "category": "sheila", "qty": "2", "unit_price": "1,000"})
+    row = db.execute("SELECT category, qty, line_total FROM invoice_items").fetchone()
+    assert tuple(row) == ("SHEILA", 2, 2000.0)
+
+
+@pytest.mark.parametrize("value", [{"a": 1}, [1], True])
+def test_order_api_rejects_non_scalar_values(factory, value):
+    factory.post("/orders", data={"order_no": "A1", "branch": "Jeddah"})
+    r = factory.post("/api/orders/1/items", json=[{"op": "create", "category": "ABAYA", "size": value}])
+    assert r.status_code == 400
+    assert r.json["errors"] == [{"index": 0, "error": "Field values must be text or numbers."}]
+
+
+def test_bool_is_not_an_item_id(factory, invoice):
+    factory.post("/orders", data={"order_no": "A1", "branch": "Jeddah"})
+    factory.post("/api/orders/1/items", json=[{"op": "create", "category": "ABAYA", "size": "52"}])
+    r = factory.post("/api/orders/1/items", json=[{"op": "update", "id": True, "category": "ABAYA", "size": "54"}])
+    assert r.status_code == 400 and r.json["errors"][0]["error"] == "Item not found."
+
+    factory.post("/api/invoices/1/items", json=[{"op": "create", "qty": 2}])
+    r = factory.post("/api/invoices/1/items", json=[{"op": "delete", "id": True}])
+    assert r.status_code == 400 and r.json["errors"][0]["error"] == "Item not found."
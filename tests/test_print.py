@@ -0,0 +1,53 @@
+from conftest import as_retail
+
+
+def _seed(db):
+    for i, (branch, status) in enumerate([("J", "READY"), ("R", "READY"), ("J", "DRAFT")], start=1):
+        db.execute("INSERT INTO orders(id, order_no, branch, order_date, status) VALUES (?,?,?,?,?)",
+                   (i, f"N{i}", branch, f"2026-01-0{i}", status))
+        db.execute("INSERT INTO order_items(order_id, category, model_number) VALUES (?, 'ABAYA', ?)", (i, f"M{i}"))
+    db.commit()
+
+
+def _sheets(client, qs=""):
+    r = client.get("/orders/print" + qs)
+    assert r.status_code == 200 and r.is_streamed
+    return r.data.decode().count('<section class="sheet">'), r.data.decode()
+
+
+def test_print_filters(factory, db):
+    _seed(db)
+    assert _sheets(factory, "?branch=J")[0] == 2
+    assert _sheets(factory, "?status=READY")[0] == 2
+    assert _sheets(factory, "?ids=1,3&branch=J")[0] == 2
+    n, html = _sheets(factory, "?from=2026-01-02&to=2026-01-02")
+    assert n == 1 and "M2" in html and "M1" not in html
+
+
+def test_print_retail_sees_own_branch(app, db):
+    _seed(db)
+    n, html = _sheets(as_retail(app.test_client(), 1, "J"), "?branch=R&from=2026-01-01")
+    assert n == 2 and "N2" not in html
+
+
+def test_print_query_streams_without_sorting(db):
+    import routes_orders
+    where = ["1=1", "o.branch=?", "o.status=?", "o.order_date>=?", "o.id IN (?,?)"]
+    plan = [r["detail"] for r in db.execute("EXPLAIN QUERY PLAN " + routes_orders.print_query(where), ["J", "READY", "2026-01-01", 1, 2])]
+    assert any("SEARCH oi USING" in p and "INDEX idx_order_items_order" in p for p in plan), plan
+    assert not any("TEMP B-TREE" in p or "AUTOMATIC" in p for p in plan), plan
+
+
+def test_unfiltered_print_defaults_to_production(factory, db):
+    _seed(db)
+    db.execute("UPDATE orders SET status='IN_PRODUCTION' WHERE id=2"); db.commit()
+    n, html = _sheets(factory)
+    assert n == 1 and "N2" in html
+
+
+def test_print_search_and_list_link_keep_q(factory, db):
+    _seed(db)
+    n, html = _sheets(factory, "?q=N3")
+    assert n == 1 and "M3" in html
+    page = factory.get("/orders?f_status=DRAFT&q=N3").data.decode()
+    assert "/orders/print?status=DRAFT&amp;q=N3" in page
@@ -0,0 +1,52 @@
+import routes_reports
+from conftest import as_retail
+
+ROLLUPS = ("rollup_sales_daily", "rollup_production_daily", "rollup_orders_daily")
+
+
+def _rollups(db):
+    # zero rows left behind by deltas are equivalent to missing rows
+    return {t: sorted(tuple(r) for r in db.execute(f"SELECT * FROM {t}") if r[-1])
+            for t in ROLLUPS}
+
+
+def test_triggers_match_backfill(db):
+    db.execute("INSERT INTO orders(id, order_no, branch, order_date, status) VALUES (1,'A','J','2026-01-05','DRAFT'), (2,'B','R','2026-01-06','READY')")
+    db.execute("INSERT INTO order_items(order_id, category, model_number) VALUES (1,'ABAYA','7'), (1,'SHEILA',NULL), (2,'ABAYA','7')")
+    db.execute("INSERT INTO invoices(id, branch_id, created_at) VALUES (1, 3, '2026-02-01 10:00:00'), (2, 4, '2026-02-02 10:00:00')")
+    db.execute("INSERT INTO invoice_items(invoice_id, item_type, category, model_number, qty, line_total) VALUES (1,'READY','ABAYA','7',2,100), (2,'READY','SHEILA','9',1,40)")
+    db.execute("UPDATE orders SET branch='R', status='READY' WHERE id=1")
+    db.execute("UPDATE invoice_items SET qty=5, line_total=250 WHERE id=1")
+    db.execute("UPDATE invoices SET branch_id=4 WHERE id=1")
+    db.execute("DELETE FROM orders WHERE id=2")
+    db.execute("DELETE FROM invoices WHERE id=2")
+    db.commit()
+
+    incremental = _rollups(db)
+    routes_reports.backfill_rollups(db)
+    assert _rollups(db) == incremental
+    assert db.execute("SELECT SUM(revenue) FROM rollup_sales_daily").fetchone()[0] == 250
+
+
+def test_reports_data_json_and_csv(factory, db):
+    db.execute("INSERT INTO orders(order_no, branch, order_date, status) VALUES ('A','J','2026-03-01','READY')")
+    db.commit()
+    r = factory.get("/reports/data?report=orders_by_status&from=2026-01-01&to=2026-12-31")
+    assert r.json["rows"] == [{"status": "READY", "orders": 1}]
+    r = factory.get("/reports/data?report=orders_by_status&format=csv&from=2026-01-01&to=2026-12-31")
+    assert r.mimetype == "text/csv" and r.data.decode().splitlines() == ["status,orders", "READY,1"]
+    assert factory.get("/reports/data?report=nope").status_code == 400
+
+
+def test_reports_are_factory_only(app):
+    retail = as_retail(app.test_client(), 1, "J")
+    assert retail.get("/reports").status_code == 302
+    assert retail.get("/reports/data").status_code == 302
+
+
+def test_parent_to_child_lookups_use_an_index(db):
+    # run by the delete/move triggers on orders and invoices; must not scan the child table
+    for sql in ("SELECT * FROM order_items WHERE order_id=1",
+                "SELECT * FROM invoice_items WHERE invoice_id=1"):
+        plan = " ".join(r["detail"] for r in db.execute("EXPLAIN QUERY PLAN " + sql))
+        assert "USING INDEX" in plan and "SCAN" not in plan, plan
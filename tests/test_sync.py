@@ -0,0 +1,70 @@
+from conftest import as_retail
+
+
+def _changes(client, since=0):
+    r = client.get(f"/api/sync/changes?since={since}")
+    assert r.status_code == 200
+    return r.json
+
+
+def test_requires_login(app):
+    assert app.test_client().get("/api/sync/changes").status_code == 401
+
+
+def test_retail_only_sees_own_branch(app, factory):
+    factory.post("/orders", data={"order_no": "A1", "branch": "Jeddah"})
+    factory.post("/orders", data={"order_no": "A2", "branch": "Riyadh"})
+    feed = _changes(as_retail(app.test_client(), 1, "Jeddah"))
+    assert [(c["entity"], c["data"]["order_no"]) for c in feed["changes"]] == [("orders", "A1")]
+
+
+def test_deleted_order_tombstones_its_items(app, factory):
+    factory.post("/orders", data={"order_no": "A1", "branch": "Jeddah"})
+    factory.post("/orders/1", data={"action": "add-item", "category": "SHEILA"})
+    factory.post("/orders/1", data={"action": "add-item", "category": "ABAYA"})
+
+    retail = as_retail(app.test_client(), 1, "Jeddah")
+    first = _changes(retail)
+    assert {(c["entity"], c["op"]) for c in first["changes"]} == {("orders", "upsert"), ("order_items", "upsert")}
+
+    factory.post("/orders/1", data={"action": "delete-order"})
+    after = _changes(retail, first["next"])
+    assert sorted((c["entity"], c["id"], c["op"]) for c in after["changes"]) == [
+        ("order_items", 1, "delete"), ("order_items", 2, "delete"), ("orders", 1, "delete")]
+
+
+def test_deleted_invoice_tombstones_its_items(app, factory, db):
+    db.execute("INSERT INTO invoices(id, branch_id) VALUES (1, 3)")
+    db.execute("INSERT INTO invoice_items(invoice_id, item_type, category) VALUES (1, 'READY', 'ABAYA')")
+    db.commit()
+    retail = as_retail(app.test_client(), 3, "Branch 3")
+    first = _changes(retail)
+
+    db.execute("DELETE FROM invoices WHERE id=1"); db.commit()
+    after = _changes(retail, first["next"])
+    assert sorted((c["entity"], c["op"]) for c in after["changes"]) == [
+        ("invoice_items", "delete"), ("invoices", "delete")]
+
+
+def test_seed_is_all_or_nothing(app, db, monkeypatch):
+    import models
+    db.execute("DELETE FROM change_log")
+    db.execute("INSERT INTO orders(id, order_no, branch) VALUES (1, 'A1', 'J')")
+    db.execute("INSERT INTO order_items(order_id, category) VALUES (1, 'ABAYA')")
+    db.execute("DELETE FROM change_log")
+    db.commit()
+
+    broken = models.SEED_CHANGE_LOG[:1] + ("INSERT INTO no_such_table VALUES (1)",)
+    monkeypatch.setattr(models, "SEED_CHANGE_LOG", broken)
+    try:
+        models.seed_change_log(db)
+    except Exception:
+        pass
+    assert db.execute("SELECT COUNT(*) FROM change_log").fetchone()[0] == 0
+
+    monkeypatch.undo()
+    models.seed_change_log(db)
+    models.seed_change_log(db)
+    assert [tuple(r) for r in db.execute("SELECT entity, op FROM change_log ORDER BY version")] == [
+        ("orders", "I"), ("order_items", "I")]
+